@@ -42,18 +42,23 @@ CSUG 2022-2025. All rights reserved.
 
 import os
 import sys
+import platform
 import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from ttkbootstrap import Style
 from tkinter import ttk
 
 # Import main functions from the three scripts
-from binToPng import process_bayer_images
+from binToPng import process_bayer_images, find_series
 from shiftRightImage import shift_right_image_file
 from detectAndFixShift import detect_and_fix_shift
 
 class binToPngTab(tk.Frame):
+	# (compression level, fast PNG encoding) preset by each encode profile
+	ENCODE_PROFILES = {"fast": (1, True), "balanced": (1, False), "archive": (9, False)}
+
 	def __init__(self, parent):
 		super().__init__(parent)
 		self.input_paths = []
@@ -101,14 +106,23 @@ class binToPngTab(tk.Frame):
 		for text, val in [("Normal (Grayscale)", "normal"), ("Colorize", "colorize"), ("Both", "both"), ("None", "none")]:
 			tk.Radiobutton(mode_frame, text=text, variable=self.mode_var, value=val).pack(side=tk.LEFT, padx=5)
 
+		# Encode profile
+		profile_frame = tk.LabelFrame(self, text="Encode profile")
+		profile_frame.pack(fill=tk.X, padx=10, pady=5)
+		self.profile_var = tk.StringVar(value="balanced")
+		for text, val in [("Fast (larger files)", "fast"), ("Balanced", "balanced"), ("Archive (smallest files)", "archive")]:
+			tk.Radiobutton(profile_frame, text=text, variable=self.profile_var, value=val, command=self.apply_encode_profile).pack(side=tk.LEFT, padx=5)
+
 		# Compression
 		comp_frame = tk.LabelFrame(self, text="Compression level (0-9)")
 		comp_frame.pack(fill=tk.X, padx=10, pady=5)
 		self.compression_scale = tk.Scale(comp_frame, from_=0, to=9, orient="horizontal", length=200, showvalue=0, command=self.update_compression_value)
-		self.compression_scale.set(3)
+		self.compression_scale.set(1)
 		self.compression_scale.pack(side=tk.LEFT, padx=5)
-		self.compression_value_label = tk.Label(comp_frame, text="3")
+		self.compression_value_label = tk.Label(comp_frame, text="1")
 		self.compression_value_label.pack(side=tk.LEFT, padx=5)
+		self.fast_png_var = tk.BooleanVar()
+		tk.Checkbutton(comp_frame, text="Fast PNG encoding (larger files)", variable=self.fast_png_var).pack(side=tk.LEFT, padx=5)
 
 		# Header/Footer
 		self.header_footer_var = tk.BooleanVar()
@@ -126,24 +140,17 @@ class binToPngTab(tk.Frame):
   
 	def update_compression_value(self, val):
 		self.compression_value_label.config(text=str(val))
+
+	def apply_encode_profile(self):
+		# Presets only: the level and fast PNG option can still be changed afterwards
+		level, fast_png = self.ENCODE_PROFILES[self.profile_var.get()]
+		self.compression_scale.set(level)
+		self.update_compression_value(level)
+		self.fast_png_var.set(fast_png)
   
 	def analyze_series(self):
-		import re
-		filelist = []
-		for path in self.input_paths:
-			if os.path.isdir(path):
-				filelist.extend([os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.bin')])
-			else:
-				filelist.append(path)
-		# Extract series prefix (e.g., 03_20250715_162736 from 03_20250715_162736_04.bin)
-		series_set = set()
-		pattern = re.compile(r"^([\w]+_\d{8}_\d{6})_")
-		for f in filelist:
-			base = os.path.basename(f)
-			m = pattern.match(base)
-			if m:
-				series_set.add(m.group(1))
-		self.series_options = sorted(series_set)
+		# Extract series prefixes (e.g., 03_20250715_162736 from 03_20250715_162736_04.bin)
+		self.series_options = find_series(self.input_paths)
 		if self.series_options:
 			self.series_entry['values'] = ["(All)"] + self.series_options
 			self.series_entry.current(0)
@@ -215,27 +222,35 @@ class binToPngTab(tk.Frame):
 			series_name = None
 
 		try:
-			process_bayer_images(
+			errors = process_bayer_images(
 				self.input_paths,
 				self.output_entry.get(),
 				self.mode_var.get(),
 				self.compression_scale.get(),
 				self.header_footer_var.get(),
 				series_name,
-				progress_callback=self.progress_callback
+				progress_callback=self.progress_callback,
+				fast_png=self.fast_png_var.get()
 			)
-			self.progress['value'] = self.progress['maximum']
-			if series_name:
-				self.set_status(f"Processing complete for series {series_name}!", color="green")
-				messagebox.showinfo("Success", f"Processing complete for series {series_name}!")
-			else:
-				self.set_status("Processing complete!", color="green")
-				messagebox.showinfo("Success", "Processing complete!")
 		except Exception as e:
-			self.set_status(f"Exception: {e}", color="red")
-			messagebox.showwarning("Error", f"Exception: {e}")
-		finally:
-			self.start_button.config(state=tk.NORMAL)
+			errors = [str(e)]
+		# Widgets and message boxes must only be touched from the Tk thread
+		self.after(0, self.processing_done, errors, series_name)
+
+	def processing_done(self, errors, series_name):
+		self.start_button.config(state=tk.NORMAL)
+		self.progress['value'] = self.progress['maximum']
+		if errors is None:
+			self.set_status("No .bin files found.", color="red")
+		elif errors:
+			self.set_status(f"Done with {len(errors)} errors.", color="red")
+			messagebox.showwarning("Done with errors", "Some files failed to process:\n" + "\n".join(errors))
+		elif series_name:
+			self.set_status(f"Processing complete for series {series_name}!", color="green")
+			messagebox.showinfo("Success", f"Processing complete for series {series_name}!")
+		else:
+			self.set_status("Processing complete!", color="green")
+			messagebox.showinfo("Success", "Processing complete!")
 
 
 class ShiftRightImageTab(tk.Frame):
@@ -425,8 +440,9 @@ def resource_path(relative_path):
 	return os.path.join(os.path.dirname(__file__), relative_path)
 
 def main():
+	# Needed for the process pool in frozen (PyInstaller) builds
+	multiprocessing.freeze_support()
 	root = tk.Tk()
-	import platform
 	system = platform.system()
 	if system == "Windows":
 		icon_path = resource_path("assets/bip-icon.ico")
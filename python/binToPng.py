@@ -28,11 +28,11 @@ CSUG 2022-2025. All rights reserved.
 
 Notes
 -----
-Requires numpy, opencv-python, and ttkbootstrap.
+Requires numpy, opencv-python, and ttkbootstrap. imagecodecs is optional and speeds up --fast-png.
 
 Usage (CLI)
 -----------
-    python binToPng.py input1.bin input2.bin -o output_dir -m colorize -c 3 -hf -s SERIES
+    python binToPng.py input1.bin input2.bin -o output_dir -m colorize -c 1 -hf -s SERIES
 
 Usage (GUI)
 -----------
@@ -43,126 +43,487 @@ Usage (GUI)
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
+import sys
 import numpy as np
 import cv2
-import glob
 import argparse
-
+import multiprocessing
+import queue
+import re
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+try:
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+# Frame layout: header row, IMG_HEIGHT rows of RGGB mosaic, footer row
+IMG_WIDTH = 4096
+IMG_HEIGHT = 4096
+FRAME_HEIGHT = IMG_HEIGHT + 2
+FRAME_SIZE = FRAME_HEIGHT * IMG_WIDTH
+HEADER_SIZE = 11
+FOOTER_SIZE = 66
+
+# Series prefix (regionID_date_time) at the start of a .bin file name
+SERIES_PREFIX_RE = re.compile(r"^([\w]+_\d{8}_\d{6})_")
+
+# Decimal strings for every byte value, so formatting a header/footer is a table lookup per byte
+_DEC256 = tuple(str(i) for i in range(256))
 
 # Helper for writing header/footer to the provided file
-def write_header_footer_to_file(hf, bin_path, raw):
-    base = os.path.splitext(os.path.basename(bin_path))[0]
-    # Extract image number from base (assumes format regionID_timestamp_ImgNb)
-    parts = base.split('_', 3)
-    if len(parts) >= 4:
-        img_nb = parts[3]
-    else:
-        img_nb = base
-    header_bytes = raw[0, :11]
-    footer_bytes = raw[-1, :66]
-    hf.write(f"File: {img_nb}\n")
-    hf.write(f"Header : {' '.join(f'{b:02X}' for b in header_bytes)}\n")
-    hf.write(f"         {' '.join(str(b) for b in header_bytes)}\n")
+def write_header_footer_to_file(hf, bin_path, header_bytes, footer_bytes, base=None, name=None):
+    # Accept numpy slices too; bytes gives C-level hex() and cheap int iteration
+    header_bytes = bytes(header_bytes)
+    footer_bytes = bytes(footer_bytes)
+    if base is None:
+        base = os.path.splitext(os.path.basename(bin_path))[0]
+    # Image number: what follows the regionID_timestamp_ series prefix (it may hold
+    # further '_', e.g. "04_fixed"); names without that prefix are kept whole
+    m = SERIES_PREFIX_RE.match(base)
+    img_nb = base[m.end():] if m else base
+    # A file shared by several images names each record (image numbers repeat across series)
+    label = img_nb if name is None else name
     analog_gain = header_bytes[8]
-    hf.write(f"Analog Gain : 0x{analog_gain:02X} ({analog_gain})\n")
     integration_time = int.from_bytes(header_bytes[9:11], byteorder='little')
     integration_time_ms = integration_time * 0.0104
-    hf.write(f"Integration Time  : 0x{integration_time:04X} ({integration_time} = {integration_time_ms:.3f} ms)\n")
-    hf.write(f"Footer : {' '.join(f'{b:02X}' for b in footer_bytes)}\n")
-    hf.write(f"         {' '.join(str(b) for b in footer_bytes)}\n\n")
-
-def process_bin_file(bin_path, output_dir, mode, compression_level, headerfooter=False):
+    # Build the whole record and write it in one call
+    hf.write("".join([
+        f"File: {label}\n",
+        f"Header : {header_bytes.hex(' ').upper()}\n",
+        f"         {' '.join([_DEC256[b] for b in header_bytes])}\n",
+        f"Analog Gain : 0x{analog_gain:02X} ({analog_gain})\n",
+        f"Integration Time  : 0x{integration_time:04X} ({integration_time} = {integration_time_ms:.3f} ms)\n",
+        f"Footer : {footer_bytes.hex(' ').upper()}\n",
+        f"         {' '.join([_DEC256[b] for b in footer_bytes])}\n\n",
+    ]))
+
+# Frame buffer reused for short files (one per process), filled in place instead of np.pad
+_padded_frame = None
+
+def get_padded_frame():
+    global _padded_frame
+    if _padded_frame is None:
+        _padded_frame = np.empty((FRAME_HEIGHT, IMG_WIDTH), dtype=np.uint8)
+    return _padded_frame
+
+# Demosaic output buffer reused across files (one per process)
+_rgb_frame = None
+
+def get_rgb_frame():
+    global _rgb_frame
+    if _rgb_frame is None:
+        _rgb_frame = np.empty((IMG_HEIGHT, IMG_WIDTH, 3), dtype=np.uint8)
+    return _rgb_frame
+
+# Set per process by init_worker; only CUDA builds of OpenCV have cv2.cuda.demosaicing
+_use_gpu = False
+
+def cuda_available():
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+def demosaic(raw_image, code, dst=None):
+    if _use_gpu:
+        gpu_raw = cv2.cuda_GpuMat()
+        gpu_raw.upload(raw_image)
+        return cv2.cuda.demosaicing(gpu_raw, code).download(dst)
+    return cv2.demosaicing(raw_image, code, dst=dst)
+
+def init_worker(mode="both", low_memory=False, single_threaded=False, gpu=False):
+    global _use_gpu
+    _use_gpu = gpu
+    if single_threaded:
+        # Several workers already use every core; OpenCV's own thread pool would oversubscribe them
+        os.environ["OMP_NUM_THREADS"] = "1"
+        cv2.setNumThreads(1)
+    # Allocate the per-process buffers up front; touching the RGB buffer
+    # faults its pages in before the first file instead of during it
+    get_padded_frame()
+    if mode in ("colorize", "both") and not low_memory:
+        get_rgb_frame().fill(0)
+
+def read_header_footer(bin_path):
+    # The header starts the first row and the footer starts the last one, so only these 77 bytes are read
     with open(bin_path, "rb") as f:
-        raw = np.fromfile(f, dtype=np.uint8)
-    expected_size = 4098 * 4096
-    if raw.size < expected_size:
-        # Pad missing bytes with zeros
-        raw = np.pad(raw, (0, expected_size - raw.size), 'constant')
-    elif raw.size > expected_size:
-        # Truncate extra bytes
-        raw = raw[:expected_size]
-    raw = raw.reshape((4098, 4096))
-    raw_image = raw[1:4097, :]
+        header_bytes = f.read(HEADER_SIZE)
+        f.seek(FRAME_SIZE - IMG_WIDTH)
+        footer_bytes = f.read(FOOTER_SIZE)
+    # Bytes missing from a short file read as zeros, as in read_bin_file
+    return header_bytes.ljust(HEADER_SIZE, b"\0"), footer_bytes.ljust(FOOTER_SIZE, b"\0")
+
+def read_bin_file(bin_path):
+    # Unbuffered: short files are read straight into the frame buffer with no intermediate copy
+    with open(bin_path, "rb", buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= FRAME_SIZE:
+            # Map the file instead of copying it; extra trailing bytes are simply not mapped
+            return np.memmap(f, dtype=np.uint8, mode="r", shape=(FRAME_HEIGHT, IMG_WIDTH)).view(np.ndarray)
+        # The returned buffer is overwritten by the next short file read in this process
+        raw = get_padded_frame()
+        flat = raw.reshape(-1)
+        # A raw read may return fewer bytes than requested, so read until EOF or a full frame
+        view = memoryview(flat)
+        n = 0
+        while n < FRAME_SIZE:
+            count = f.readinto(view[n:])
+            if not count:
+                break
+            n += count
+    # Pad missing bytes with zeros
+    flat[n:] = 0
+    return raw
+
+def use_imagecodecs_png(fast_png):
+    return fast_png and imagecodecs is not None
+
+# Encoded files waiting to be written, drained by one writer thread per process
+_write_queue = None
+_write_queue_lock = threading.Lock()
+_write_errors = []
+
+def writer_loop():
+    while True:
+        path, data = _write_queue.get()
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except Exception as e:
+            _write_errors.append(f"{os.path.basename(path)}: {e}")
+        finally:
+            _write_queue.task_done()
+
+def write_file_async(path, data):
+    global _write_queue
+    # Called from the encode thread too, so the writer is started under a lock
+    with _write_queue_lock:
+        if _write_queue is None:
+            # Bounded so encoded images cannot pile up in memory behind a slow disk
+            _write_queue = queue.Queue(maxsize=2)
+            threading.Thread(target=writer_loop, daemon=True).start()
+    _write_queue.put((path, data))
+
+def flush_writes():
+    if _write_queue is not None:
+        _write_queue.join()
+    if _write_errors:
+        message = "; ".join(_write_errors)
+        _write_errors.clear()
+        raise OSError(f"Could not write {message}")
+
+def write_png(path, image, compression_level, fast_png=False):
+    # Fast mode: zlib RLE strategy, ~3x faster to encode for slightly larger files. imagecodecs
+    # also fixes the filter (SUB for RGB, none for raw); OpenCV keeps libpng's adaptive filtering
+    if use_imagecodecs_png(fast_png):
+        # Neighbouring pixels of the raw mosaic are different colours, so row filters only cost time there
+        png_filter = imagecodecs.PNG.FILTER.SUB if image.ndim == 3 else imagecodecs.PNG.FILTER.NONE
+        data = imagecodecs.png_encode(image, level=compression_level, strategy=imagecodecs.PNG.STRATEGY.RLE, filter=png_filter)
+    else:
+        compression_params = [cv2.IMWRITE_PNG_COMPRESSION, compression_level]
+        if fast_png:
+            compression_params += [cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]
+        ok, data = cv2.imencode(".png", image, compression_params)
+        if not ok:
+            raise RuntimeError(f"Could not encode PNG for {path}")
+    # Encode in memory and hand the write to the writer thread, so the disk write
+    # overlaps the next encode (the colorized image in "both" mode)
+    write_file_async(path, data)
+
+def write_png_chunk(f, chunk_type, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+def write_colorized_png_in_strips(path, raw_image, compression_level, fast_png=False, strip_rows=128):
+    # Demosaic and deflate the frame strip by strip, so the full RGB image is never held in memory
+    height, width = raw_image.shape
+    # Fast mode uses the same RLE strategy as write_png (the SUB filter is always used here)
+    compressor = zlib.compressobj(compression_level, strategy=zlib.Z_RLE if fast_png else zlib.Z_DEFAULT_STRATEGY)
+    # Each PNG scanline is a filter type byte (1 = SUB) followed by the filtered RGB pixels
+    scanlines = np.empty((strip_rows, 1 + width * 3), dtype=np.uint8)
+    scanlines[:, 0] = 1
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        write_png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        for start in range(0, height, strip_rows):
+            stop = min(start + strip_rows, height)
+            # A 2-row halo keeps the Bayer phase and gives the strip edges their real neighbours
+            lo = max(start - 2, 0)
+            hi = min(stop + 2, height)
+            rgb = cv2.demosaicing(raw_image[lo:hi], cv2.COLOR_BAYER_RG2BGR)[start - lo:stop - lo].reshape(stop - start, -1)
+            rows = scanlines[:stop - start]
+            rows[:, 1:4] = rgb[:, :3]
+            np.subtract(rgb[:, 3:], rgb[:, :-3], out=rows[:, 4:])
+            write_png_chunk(f, b"IDAT", compressor.compress(rows))
+        write_png_chunk(f, b"IDAT", compressor.flush())
+        write_png_chunk(f, b"IEND", b"")
+
+def write_bayer_lz4(path, raw_image):
+    # Lossless archival format: bit-shuffled mosaic in an LZ4 frame, several times faster than PNG
+    if imagecodecs is None:
+        raise RuntimeError("The lz4 output format requires the imagecodecs package")
+    data = imagecodecs.lz4f_encode(imagecodecs.bitshuffle_encode(raw_image), level=1)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def read_bayer_lz4(path):
+    # Inverse of write_bayer_lz4, returns the 4096x4096 mosaic
+    with open(path, "rb") as f:
+        data = f.read()
+    return np.frombuffer(imagecodecs.bitshuffle_decode(imagecodecs.lz4f_decode(data)), dtype=np.uint8).reshape((IMG_HEIGHT, IMG_WIDTH))
+
+# Second encode thread of a worker process, see write_png_files
+_encode_thread = None
+
+def get_encode_thread():
+    global _encode_thread
+    if _encode_thread is None:
+        _encode_thread = ThreadPoolExecutor(max_workers=1)
+    return _encode_thread
+
+def write_raw_file(raw_image, output_dir, base, compression_level, fast_png=False, raw_format="png"):
+    if raw_format == "lz4":
+        write_bayer_lz4(os.path.join(output_dir, f"{base}.bayer.lz4"), raw_image)
+    else:
+        write_png(os.path.join(output_dir, f"{base}.png"), raw_image, compression_level, fast_png)
+
+def write_png_files(raw_image, output_dir, base, mode, compression_level, fast_png=False, low_memory=False, raw_format="png"):
+    do_normal = mode in ("normal", "both")
+    do_color = mode in ("colorize", "both")
+    # OpenCV and imagecodecs work on the rows in place and need C-contiguous memory
+    assert raw_image.flags.c_contiguous
+    raw_future = None
+    try:
+        if do_normal and do_color and not low_memory:
+            # The encoders release the GIL, so the raw image is encoded on a second
+            # thread while the colorized image is demosaiced and encoded here
+            raw_future = get_encode_thread().submit(write_raw_file, raw_image, output_dir, base, compression_level, fast_png, raw_format)
+        elif do_normal:
+            write_raw_file(raw_image, output_dir, base, compression_level, fast_png, raw_format)
+        if do_color and low_memory:
+            write_colorized_png_in_strips(os.path.join(output_dir, f"{base}_colorize.png"), raw_image, compression_level, fast_png)
+        elif do_color:
+            # OpenCV names Bayer codes after the second row: for this RGGB sensor RG2RGB gives
+            # BGR order (expected by cv2.imwrite) and RG2BGR gives RGB order (expected by imagecodecs)
+            code = cv2.COLOR_BAYER_RG2BGR if use_imagecodecs_png(fast_png) else cv2.COLOR_BAYER_RG2RGB
+            rgb_image = demosaic(raw_image, code, dst=get_rgb_frame())
+            write_png(os.path.join(output_dir, f"{base}_colorize.png"), rgb_image, compression_level, fast_png)
+        if raw_future is not None:
+            raw_future.result()
+    finally:
+        if raw_future is not None:
+            # Also wait when the colorized image failed, so the frame is not reused under the encoder
+            wait([raw_future])
+        # Wait for queued writes so a failed write is reported with the file it belongs to
+        flush_writes()
+
+def process_bin_file(bin_path, output_dir, mode, compression_level, headerfooter=False, fast_png=False, low_memory=False, raw_format="png"):
     base = os.path.splitext(os.path.basename(bin_path))[0]
-    compression_params = [cv2.IMWRITE_PNG_COMPRESSION, compression_level]
-    if mode in ("normal", "both"):
-        cv2.imwrite(os.path.join(output_dir, f"{base}.png"), raw_image, compression_params)
-    if mode in ("colorize", "both"):
-        rgb_image = cv2.cvtColor(raw_image, cv2.COLOR_BAYER_RG2RGB)
-        cv2.imwrite(os.path.join(output_dir, f"{base}_colorize.png"), rgb_image, compression_params)
+    if mode == "none":
+        # No PNG output: skip reading the frame and fetch the header/footer bytes only
+        header_bytes, footer_bytes = read_header_footer(bin_path)
+    else:
+        raw = read_bin_file(bin_path)
+        raw_image = raw[1:-1, :]
+        write_png_files(raw_image, output_dir, base, mode, compression_level, fast_png, low_memory, raw_format)
+        header_bytes, footer_bytes = raw[0, :HEADER_SIZE].tobytes(), raw[-1, :FOOTER_SIZE].tobytes()
     # Header/Footer extraction and writing
     if headerfooter:
         header_footer_file = os.path.join(output_dir, f"{base}_header_footer.txt")
         with open(header_footer_file, "w") as hf:
-            write_header_footer_to_file(hf, bin_path, raw)
+            write_header_footer_to_file(hf, bin_path, header_bytes, footer_bytes, base)
+    return header_bytes, footer_bytes
+
+# Worker for series processing: writes the PNGs and returns only the header and
+# footer bytes, so the shared header/footer file can be written in order by the caller
+def process_series_bin_file(bin_path, output_dir, mode, compression_level, fast_png=False, low_memory=False, raw_format="png"):
+    if mode == "none":
+        return read_header_footer(bin_path)
+    raw = read_bin_file(bin_path)
+    base = os.path.splitext(os.path.basename(bin_path))[0]
+    write_png_files(raw[1:-1, :], output_dir, base, mode, compression_level, fast_png, low_memory, raw_format)
+    return raw[0, :HEADER_SIZE].tobytes(), raw[-1, :FOOTER_SIZE].tobytes()
+
+def is_bin_name(name):
+    # Like glob("*.bin"): no hidden files (e.g. macOS "._" AppleDouble files), any suffix case
+    return not name.startswith(".") and name.lower().endswith(".bin")
+
+def find_bin_files(directory, prefix=""):
+    # Single scandir pass (no extra stat per entry), sorted for a deterministic processing order
+    with os.scandir(directory) as entries:
+        return sorted(e.path for e in entries if e.name.startswith(prefix) and is_bin_name(e.name) and e.is_file())
+
+# Series prefixes found per directory, with the directory mtime they were scanned at
+_series_cache = {}
+
+def find_directory_series(directory):
+    # Adding, removing or renaming a file changes the directory mtime, so an unchanged
+    # mtime means the last scan is still valid (the GUI rescans on every list change)
+    mtime = os.stat(directory).st_mtime_ns
+    cached = _series_cache.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    series = set()
+    with os.scandir(directory) as entries:
+        for e in entries:
+            if is_bin_name(e.name) and e.is_file():
+                m = SERIES_PREFIX_RE.match(e.name)
+                if m:
+                    series.add(m.group(1))
+    _series_cache[directory] = (mtime, series)
+    return series
+
+def find_series(inputs):
+    # Sorted series prefixes of the .bin files in inputs, one scandir pass per directory
+    series = set()
+    for inp in inputs:
+        if os.path.isdir(inp):
+            series.update(find_directory_series(inp))
+        else:
+            m = SERIES_PREFIX_RE.match(os.path.basename(inp))
+            if m:
+                series.add(m.group(1))
+    return sorted(series)
+
+def warm_page_cache(path):
+    # Get the file into the OS page cache so a worker's read does not wait on the disk
+    try:
+        with open(path, "rb") as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                chunk = bytearray(1 << 20)
+                while f.readinto(chunk):
+                    pass
+    except OSError:
+        pass  # The worker reports the actual error
+
+def prefetched(paths, lookahead):
+    # Yield paths in order, keeping the next `lookahead` files being read in the background
+    with ThreadPoolExecutor(max_workers=1) as io_pool:
+        for path in paths[:lookahead]:
+            io_pool.submit(warm_page_cache, path)
+        for idx, path in enumerate(paths):
+            if idx + lookahead < len(paths):
+                io_pool.submit(warm_page_cache, paths[idx + lookahead])
+            yield path
+
+def worker_count(workers, n_tasks):
+    return max(1, min(workers or os.cpu_count() or 1, n_tasks))
+
+def create_executor(workers, n_tasks, mode, low_memory=False, gpu=False):
+    # "spawn" keeps workers clean when called from the GUI thread (forking a Tk process is unsafe)
+    max_workers = worker_count(workers, n_tasks)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker, initargs=(mode, low_memory, max_workers > 1, gpu))
+
+def run_file_tasks(task, bin_files, task_args, workers, mode, low_memory=False, gpu=False, ordered=False):
+    # Yields (bin_file, result, error) for each file, in input order if ordered, else as they
+    # complete, while the files just behind those being converted are read ahead
+    max_workers = worker_count(workers, len(bin_files))
+    lookahead = 2 * max_workers
+    if max_workers == 1:
+        # A single worker runs here: spawning one process would only add its startup and imports
+        init_worker(mode, low_memory, False, gpu)
+        for bin_file in prefetched(bin_files, lookahead):
+            try:
+                result, error = task(bin_file, *task_args), None
+            except Exception as e:
+                result, error = None, e
+            yield bin_file, result, error
+        return
+    with create_executor(workers, len(bin_files), mode, low_memory, gpu) as executor:
+        futures = {executor.submit(task, bin_file, *task_args): bin_file for bin_file in bin_files}
+        for _, future in zip(prefetched(bin_files, lookahead), futures if ordered else as_completed(futures)):
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            yield futures[future], result, error
 
-def process_series_bin_files(series_name, inputs, output_dir, mode, compression_level, write_headerfooter=False, progress_callback=None):
-    pattern = f"{series_name}_*.bin"
+def process_series_bin_files(series_name, inputs, output_dir, mode, compression_level, write_headerfooter=False, progress_callback=None, workers=None, fast_png=False, low_memory=False, raw_format="png", gpu=False):
     series_files = []
     for inp in inputs:
         if os.path.isdir(inp):
-            series_files.extend(glob.glob(os.path.join(inp, pattern)))
+            series_files.extend(find_bin_files(inp, f"{series_name}_"))
         elif inp.lower().endswith(".bin") and os.path.basename(inp).startswith(f"{series_name}_"):
             series_files.append(inp)
     if not series_files:
         print("No matching .bin files found for the given series name.")
-        return
+        return None
+    if mode == "none" and not write_headerfooter:
+        print("Nothing to do: mode is none and no header/footer output was requested.")
+        return []
     os.makedirs(output_dir, exist_ok=True)
     total_files = len(series_files)
+    errors = []
     hf = None
     if write_headerfooter:
         header_footer_file = os.path.join(output_dir, f"{series_name}_header_footer.txt")
-        hf = open(header_footer_file, "w")
+        # One record per file; a large buffer batches them into few writes
+        hf = open(header_footer_file, "w", buffering=1 << 20)
     try:
-        for idx, bin_file in enumerate(series_files, 1):
+        # Collect results in submission order to keep the header/footer file ordered
+        tasks = run_file_tasks(process_series_bin_file, series_files, (output_dir, mode, compression_level, fast_png, low_memory, raw_format), workers, mode, low_memory, gpu, ordered=True)
+        for idx, (bin_file, header_footer, error) in enumerate(tasks, 1):
+            bin_name = os.path.basename(bin_file)
             if progress_callback:
                 progress_callback(idx, total_files, bin_file)
-            print(f"Processing image {idx} of {total_files}: {os.path.basename(bin_file)}")
-            with open(bin_file, "rb") as f:
-                raw = np.fromfile(f, dtype=np.uint8)
-            expected_size = 4098 * 4096
-            if raw.size < expected_size:
-                raw = np.pad(raw, (0, expected_size - raw.size), 'constant')
-            elif raw.size > expected_size:
-                raw = raw[:expected_size]
-            raw = raw.reshape((4098, 4096))
+            print(f"Processing image {idx} of {total_files}: {bin_name}")
+            if error is not None:
+                errors.append(f"{bin_name}: {error}")
+                continue
             # Optionally write header/footer info for this file
             if hf:
-                write_header_footer_to_file(hf, bin_file, raw)
-            # Optionally, generate PNGs if requested
-            base = os.path.splitext(os.path.basename(bin_file))[0]
-            compression_params = [cv2.IMWRITE_PNG_COMPRESSION, compression_level]
-            raw_image = raw[1:4097, :]
-            if mode in ("normal", "both"):
-                cv2.imwrite(os.path.join(output_dir, f"{base}.png"), raw_image, compression_params)
-            if mode in ("colorize", "both"):
-                rgb_image = cv2.cvtColor(raw_image, cv2.COLOR_BAYER_RG2RGB)
-                cv2.imwrite(os.path.join(output_dir, f"{base}_colorize.png"), rgb_image, compression_params)
+                write_header_footer_to_file(hf, bin_file, *header_footer, os.path.splitext(bin_name)[0])
     finally:
         if hf:
             hf.close()
-    
-# Unified entry point for GUI and CLI
-def process_bayer_images(inputs, output, mode, compression, headerfooter, series=None, progress_callback=None):
+    return errors
+
+# Unified entry point for GUI and CLI.
+# Returns the list of per-file errors ("name: error"), or None if no .bin file was found.
+def process_bayer_images(inputs, output, mode, compression, headerfooter, series=None, progress_callback=None, workers=None, fast_png=False, low_memory=False, raw_format="png", hf_combined=False, gpu=False):
     if series:
-        process_series_bin_files(series, inputs, output, mode, compression, write_headerfooter=headerfooter, progress_callback=progress_callback)
+        return process_series_bin_files(series, inputs, output, mode, compression, write_headerfooter=headerfooter, progress_callback=progress_callback, workers=workers, fast_png=fast_png, low_memory=low_memory, raw_format=raw_format, gpu=gpu)
     else:
         # Gather all .bin files from inputs
         bin_files = []
         for inp in inputs:
             if os.path.isdir(inp):
-                bin_files.extend(glob.glob(os.path.join(inp, "*.bin")))
+                bin_files.extend(find_bin_files(inp))
             elif inp.lower().endswith(".bin"):
                 bin_files.append(inp)
         if not bin_files:
             print("No .bin files found in the provided inputs.")
-            return
+            return None
+        if mode == "none" and not headerfooter:
+            print("Nothing to do: mode is none and no header/footer output was requested.")
+            return []
         os.makedirs(output, exist_ok=True)
         total = len(bin_files)
-        for idx, bin_file in enumerate(bin_files, 1):
+        errors = []
+        # With hf_combined, the workers skip the per-file text files and the records
+        # are written here, in input order, to a single header_footer.txt
+        per_file_headerfooter = headerfooter and not hf_combined
+        header_footers = {}
+        tasks = run_file_tasks(process_bin_file, bin_files, (output, mode, compression, per_file_headerfooter, fast_png, low_memory, raw_format), workers, mode, low_memory, gpu)
+        for idx, (bin_file, header_footer, error) in enumerate(tasks, 1):
+            if error is None:
+                header_footers[bin_file] = header_footer
+            else:
+                errors.append(f"{os.path.basename(bin_file)}: {error}")
             if progress_callback:
                 progress_callback(idx, total, bin_file)
-            process_bin_file(bin_file, output, mode, compression, headerfooter)
+        if headerfooter and hf_combined:
+            with open(os.path.join(output, "header_footer.txt"), "w", buffering=1 << 20) as hf:
+                for bin_file in bin_files:
+                    if bin_file in header_footers:
+                        write_header_footer_to_file(hf, bin_file, *header_footers[bin_file], name=bin_file)
+        return errors
 
 
 # CLI logic
@@ -177,27 +538,60 @@ def cli_main(args=None):
         help="Output mode: normal (raw PNG), colorize (RGB PNG), both, or none (no PNG output, only header/footer if requested). Default is colorize."
     )
     parser.add_argument(
-        "-c", "--compression", type=int, default=3, choices=range(0,10), metavar="[0-9]",
-        help="PNG compression level: 0 (none, fastest) to 9 (max, slowest). Default is 3."
+        "-c", "--compression", type=int, default=1, choices=range(0,10), metavar="[0-9]",
+        help="PNG compression level: 0 (none, fastest) to 9 (max, slowest). Default is 1."
+    )
+    parser.add_argument(
+        "--fast-png", action="store_true",
+        help="Encode PNGs with the zlib RLE strategy. Much faster, slightly larger files. With imagecodecs installed, the row filter is also fixed (SUB for colorized PNGs, none for raw PNGs); otherwise OpenCV keeps its adaptive filtering."
+    )
+    parser.add_argument(
+        "--low-memory", action="store_true",
+        help="Demosaic and encode colorized PNGs in strips instead of holding the full RGB frame in memory."
+    )
+    parser.add_argument(
+        "--gpu", action="store_true",
+        help="Debayer colorized images on a CUDA GPU (needs OpenCV built with CUDA; not used with --low-memory)."
+    )
+    parser.add_argument(
+        "-f", "--format", choices=["png", "lz4"], default="png",
+        help="Format of the raw (normal mode) output: png, or lz4 for a bit-shuffled LZ4 archive (.bayer.lz4, requires imagecodecs). Default is png."
     )
     parser.add_argument(
         "-hf", "--headerfooter", action="store_true", help="Extract and write header/footer info to a text file."
     )
+    parser.add_argument(
+        "--hf-combined", action="store_true",
+        help="With -hf, write the header/footer info of all files to a single header_footer.txt instead of one file per image."
+    )
     parser.add_argument(
         "-s", "--series", type=str, help="Series name for image series processing (e.g. 03_20250715_162736)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="Number of worker processes used to convert files in parallel. Default is the number of CPUs.")
 
     if args is None:
         args = parser.parse_args()
     else:
         args = parser.parse_args(args)
+    if args.format == "lz4" and imagecodecs is None:
+        parser.error("--format lz4 requires the imagecodecs package")
+    if args.gpu and not cuda_available():
+        print("Warning: no CUDA device available to OpenCV, debayering on the CPU.")
+        args.gpu = False
 
-    process_bayer_images(args.inputs, args.output, args.mode, args.compression, args.headerfooter, args.series)
+    errors = process_bayer_images(args.inputs, args.output, args.mode, args.compression, args.headerfooter, args.series, workers=args.jobs, fast_png=args.fast_png, low_memory=args.low_memory, raw_format=args.format, hf_combined=args.hf_combined, gpu=args.gpu)
+    if errors:
+        print(f"{len(errors)} file(s) failed to process:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+    # Non-zero exit status when any file failed, for scripts and batch callers
+    return 1 if errors else 0
 
 
 
 # Tkinter GUI setup
 
-import threading
 # from tkinter import ttk
 import ttkbootstrap as ttk
 from ttkbootstrap import Style
@@ -273,11 +667,16 @@ class binToPngApp:
         compression_frame = tk.Frame(self.root)
         compression_frame.pack(pady=2)
         self.compression_scale = tk.Scale(compression_frame, from_=0, to=9, orient="horizontal", length=200, showvalue=0, command=self.update_compression_value)
-        self.compression_scale.set(3)
+        self.compression_scale.set(1)
         self.compression_scale.pack(side=tk.LEFT)
         self.compression_value_label = tk.Label(compression_frame, text=str(self.compression_scale.get()))
         self.compression_value_label.pack(side=tk.LEFT, padx=(8,0))
 
+        # Fast PNG checkbox
+        self.fast_png_var = tk.BooleanVar()
+        self.fast_png_checkbox = tk.Checkbutton(root, text="Fast PNG encoding (larger files)", variable=self.fast_png_var)
+        self.fast_png_checkbox.pack(pady=(5, 0))
+
         # Header/Footer checkbox
         self.header_footer_var = tk.BooleanVar()
         self.header_footer_checkbox = tk.Checkbutton(root, text="Save header/footer info", variable=self.header_footer_var)
@@ -321,23 +720,8 @@ class binToPngApp:
         self.analyze_series()
 
     def analyze_series(self):
-        # Scan all .bin files in input_paths and extract series prefixes
-        import re
-        filelist = []
-        for path in self.input_paths:
-            if os.path.isdir(path):
-                filelist.extend([os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.bin')])
-            else:
-                filelist.append(path)
-        # Extract series prefix (e.g., 03_20250715_162736 from 03_20250715_162736_04.bin)
-        series_set = set()
-        pattern = re.compile(r"^([\w]+_\d{8}_\d{6})_")
-        for f in filelist:
-            base = os.path.basename(f)
-            m = pattern.match(base)
-            if m:
-                series_set.add(m.group(1))
-        self.series_options = sorted(series_set)
+        # Extract series prefixes (e.g., 03_20250715_162736 from 03_20250715_162736_04.bin)
+        self.series_options = find_series(self.input_paths)
         if self.series_options:
             self.series_label.pack(pady=(10, 0))
             self.series_combobox['values'] = ["(All)"] + self.series_options
@@ -376,8 +760,10 @@ class binToPngApp:
             cli_args.append(f'-m {mode}')
         # Compression
         compression = self.compression_scale.get()
-        if compression != 3:
+        if compression != 1:
             cli_args.append(f'-c {compression}')
+        if self.fast_png_var.get():
+            cli_args.append('--fast-png')
         # Header/footer
         if self.header_footer_var.get():
             cli_args.append('-hf')
@@ -395,79 +781,49 @@ class binToPngApp:
         thread = threading.Thread(target=self.process_all)
         thread.start()
 
+    def progress_callback(self, current, total, filename=None):
+        # Called from the worker thread, so use after() to update the GUI
+        def update():
+            self.progress['maximum'] = total
+            self.progress['value'] = current
+            self.set_status(f"Processing {current}/{total}: {os.path.basename(filename)}")
+        self.root.after(0, update)
+
     def process_all(self):
         mode = self.mode_var.get()
         compression_level = self.compression_scale.get()
         write_headerfooter = self.header_footer_var.get()
-        import re
-        filelist = []
-        for path in self.input_paths:
-            if os.path.isdir(path):
-                filelist.extend([os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.bin')])
-            else:
-                filelist.append(path)
-        # If a series is selected, filter filelist
+        fast_png = self.fast_png_var.get()
         selected_series = self.series_combobox.get() if self.series_options else ""
-        if selected_series and selected_series != "(All)":
-            # Use series string directly (no re.escape) so underscores are not escaped
-            pattern = re.compile(rf"^{selected_series}_\d+\.bin$")
-            # debug_checked = []
-            filtered = []
-            for f in filelist:
-                fname = os.path.basename(f)
-                # debug_checked.append(fname)
-                if pattern.match(fname):
-                    filtered.append(f)
-            # print(f"[DEBUG] Files checked for series '{selected_series}': {debug_checked}")
-            # print(f"[DEBUG] Files matched for series '{selected_series}': {[os.path.basename(f) for f in filtered]}")
-            if not filtered:
-                self.set_status(f"No .bin files found for series {selected_series}.", color="red")
-                self.start_button.config(state=tk.NORMAL)
-                return
-            # Use process_series_bin_files for series
-            self.progress['maximum'] = len(filtered)
-            errors = []
-            try:
-                process_series_bin_files(selected_series, self.input_paths, self.output_dir, mode, compression_level, write_headerfooter)
-            except Exception as e:
-                errors.append(str(e))
-            self.progress['value'] = len(filtered)
-            self.set_status(f"Processing complete for series {selected_series}.", color="green" if not errors else "red")
-            self.start_button.config(state=tk.NORMAL)
-            if errors:
-                messagebox.showwarning("Done with errors", "Some files failed to process:\n" + "\n".join(errors))
-            else:
-                messagebox.showinfo("Success", f"Processing complete for series {selected_series}!")
-            return
-        # Otherwise, process all files as before
-        total = len(filelist)
-        if total == 0:
-            self.set_status("No .bin files found.", color="red")
-            self.start_button.config(state=tk.NORMAL)
-            return
-        self.progress['maximum'] = total
-        errors = []
-        for idx, bin_path in enumerate(filelist, 1):
-            try:
-                process_bin_file(bin_path, self.output_dir, mode, compression_level, write_headerfooter)
-            except Exception as e:
-                errors.append(f"{os.path.basename(bin_path)}: {e}")
-            self.progress['value'] = idx
-            self.set_status(f"Processing {idx}/{total}: {os.path.basename(bin_path)}")
-            self.root.update_idletasks()
+        series = selected_series if selected_series and selected_series != "(All)" else None
+        try:
+            errors = process_bayer_images(self.input_paths, self.output_dir, mode, compression_level, write_headerfooter, series, progress_callback=self.progress_callback, fast_png=fast_png)
+        except Exception as e:
+            errors = [str(e)]
+        # Widgets and message boxes must only be touched from the Tk thread
+        self.root.after(0, self.processing_done, errors, series)
+
+    def processing_done(self, errors, series):
         self.start_button.config(state=tk.NORMAL)
+        if errors is None:
+            self.set_status(f"No .bin files found for series {series}." if series else "No .bin files found.", color="red")
+            return
+        self.progress['value'] = self.progress['maximum']
         if errors:
             self.set_status(f"Done with {len(errors)} errors.", color="red")
             messagebox.showwarning("Done with errors", "Some files failed to process:\n" + "\n".join(errors))
+        elif series:
+            self.set_status(f"Processing complete for series {series}.", color="green")
+            messagebox.showinfo("Success", f"Processing complete for series {series}!")
         else:
             self.set_status("Processing complete!", color="green")
             messagebox.showinfo("Success", "Processing complete!")
 
 # Run the app
 if __name__ == "__main__":
-    import sys
+    multiprocessing.freeze_support()
     if len(sys.argv) > 1:
-        cli_main()
+        sys.exit(cli_main())
     else:
         root = tk.Tk()
         app = binToPngApp(root)
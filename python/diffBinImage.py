@@ -23,42 +23,45 @@ Notes
 Execution:   python diffBinImage.py file1.bin file2.bin
 """
 
+import os
 import sys
+import numpy as np
 
-if len(sys.argv) != 3:
-    print(f"Usage: {sys.argv[0]} file1 file2")
-    sys.exit(1)
-
-file1 = sys.argv[1]
-file2 = sys.argv[2]
-
-with open(file1, "rb") as f1, open(file2, "rb") as f2:
-    pos = 0
-    diff_start = None
-
-    while True:
-        b1 = f1.read(1)
-        b2 = f2.read(1)
-
-        if not b1 and not b2:
-            if diff_start is not None:
-                print(f"Difference from byte {diff_start} to {pos - 1}")
-            break
-
-        if b1 != b2:
-            if diff_start is None:
-                diff_start = pos
-        else:
-            if diff_start is not None:
-                print(f"Difference from byte {diff_start} to {pos - 1}")
-                diff_start = None
-
-        pos += 1
-
-    # If one file is longer than the other
-    extra1 = f1.read()
-    extra2 = f2.read()
-    if extra1:
-        print(f"{file1} is longer starting at byte {pos}")
-    elif extra2:
-        print(f"{file2} is longer starting at byte {pos}")
+
+def load_bytes(path):
+    # Map the file read-only instead of reading it; an empty file cannot be mapped
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def diff_bin_files(file1, file2):
+    data1 = load_bytes(file1)
+    data2 = load_bytes(file2)
+    common = min(data1.size, data2.size)
+
+    # Bytes past the end of the shorter file count as different
+    mask = np.ones(max(data1.size, data2.size), dtype=bool)
+    np.not_equal(data1[:common], data2[:common], out=mask[:common])
+
+    # Differing runs start where the mask goes 0 -> 1 and end before it goes 1 -> 0
+    # (int8 padding, as a Python int 0 would promote the edges to int64, 8 bytes per input byte)
+    pad = np.zeros(1, dtype=np.int8)
+    edges = np.diff(mask.view(np.int8), prepend=pad, append=pad)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    for diff_start, diff_end in zip(starts.tolist(), ends.tolist()):
+        print(f"Difference from byte {diff_start} to {diff_end}")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} file1 file2")
+        return 1
+
+    diff_bin_files(sys.argv[1], sys.argv[2])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
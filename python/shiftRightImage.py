@@ -25,14 +25,16 @@ Execution:   python shiftRightImage.py img_file shift_count start_row [start_col
 
 import sys
 import os
+import shutil
+import ctypes
+import tempfile
 import numpy as np
 
 IMG_WIDTH = 4096
 FRAME_HEIGHT = 4098
 
 
-def shift_image_region_numpy(buf: np.ndarray, img_width: int, img_height: int,
-                             shift_count: int, start_row: int, start_col: int) -> int:
+def check_shift_region(img_width: int, img_height: int, shift_count: int, start_row: int, start_col: int) -> int:
     if shift_count < 1:
         print(f"ERROR in shiftImageRegion: Invalid shift_count {shift_count}. Must be >= 1.")
         return 1
@@ -41,9 +43,6 @@ def shift_image_region_numpy(buf: np.ndarray, img_width: int, img_height: int,
         print(f"ERROR in shiftImageRegion: Invalid start_row/start_col ({start_row},{start_col}).")
         return 1
 
-    # Reshape flat buffer into 2D image
-    img = buf.reshape((img_height, img_width))
-
     # Flattened offset (like in C)
     offset = start_row * img_width + start_col
     total_pixels = img_width * img_height
@@ -56,9 +55,30 @@ def shift_image_region_numpy(buf: np.ndarray, img_width: int, img_height: int,
         print(f"ERROR in shiftImageRegion: Invalid shift_count {shift_count} for region size {region_size}.")
         return 1
 
-    # Flatten again from offset onwards and shift
+    return 0
+
+
+def shift_image_region_numpy(buf: np.ndarray, img_width: int, img_height: int,
+                             shift_count: int, start_row: int, start_col: int) -> int:
+    result = check_shift_region(img_width, img_height, shift_count, start_row, start_col)
+    if result != 0:
+        return result
+
+    # Reshape flat buffer into 2D image
+    img = buf.reshape((img_height, img_width))
+
+    offset = start_row * img_width + start_col
+    region_size = img_width * img_height - offset
+
+    # memmove writes through a raw pointer, so refuse read-only buffers instead of crashing
+    if not buf.flags.writeable:
+        print("ERROR in shiftImageRegion: Buffer is read-only.")
+        return 1
+
+    # Flatten again from offset onwards and shift; the region is contiguous,
+    # so the shift is a single overlapping memmove (like in C)
     region = img.ravel()[offset:]
-    region[shift_count:] = region[:-shift_count]
+    ctypes.memmove(region.ctypes.data + shift_count, region.ctypes.data, region_size - shift_count)
     region[:shift_count] = 0
 
     return 0
@@ -83,25 +103,39 @@ def shift_right_image_file(img_file, output_file, shift_count, start_row, start_
         print(f"ERROR in shiftRightImage: Incorrect file size for {img_file}: {fsize} != expected {img_width * img_height}")
         return 1
 
-    try:
-        with open(img_file, "rb") as fd:
-            buf = np.frombuffer(fd.read(), dtype=np.uint8).copy()
-            if buf.size != img_width * img_height:
-                print(f"ERROR in shiftRightImage: Incomplete read. Got {buf.size} pixels instead of {img_width * img_height}")
-                return 1
-
-            result = shift_image_region_numpy(buf, img_width, img_height, shift_count, start_row, start_col)
-            if result != 0:
-                print(f"ERROR in shiftRightImage: shiftImageRegion failed with error code {result}")
-                return result
+    # Validate the whole shift before the output is touched, so a rejected shift leaves it as it was
+    result = check_shift_region(img_width, img_height, shift_count, start_row, start_col)
+    if result != 0:
+        print(f"ERROR in shiftRightImage: shiftImageRegion failed with error code {result}")
+        return result
 
-        with open(output_file, "wb") as out_fd:
-            out_fd.write(buf.tobytes())
+    tmp_file = None
+    try:
+        # Shift a copy of the input in place through a memory map: the file is copied by the
+        # OS and only the shifted pages are written back, with no read()/write() of the frame.
+        # The copy is a temporary file next to the output, moved over it only once shifted
+        fd, tmp_file = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(output_file)))
+        os.close(fd)
+        shutil.copy(img_file, tmp_file)
+        buf = np.memmap(tmp_file, dtype=np.uint8, mode="r+", shape=(img_width * img_height,))
+        result = shift_image_region_numpy(buf, img_width, img_height, shift_count, start_row, start_col)
+        if result != 0:
+            print(f"ERROR in shiftRightImage: shiftImageRegion failed with error code {result}")
+            del buf
+            return result
+        buf.flush()
+        del buf
+        os.replace(tmp_file, output_file)
+        tmp_file = None
 
     except Exception as e:
         print(f"ERROR in shiftRightImage: Exception occurred - {e}")
         return 1
 
+    finally:
+        if tmp_file is not None:
+            os.remove(tmp_file)
+
     print(f"Successfully shifted image region in {img_file} and wrote to {output_file}")
     return 0
 